@@ -1,14 +1,9 @@
 import argparse
-from dataclasses import dataclass
-from typing import Iterator
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatch
+import hashlib
+import importlib.metadata
 import numpy as np
-import matplotlib.ticker as mticker
-import matplotlib
 from datetime import date
-
-matplotlib.rcParams['font.family'] = 'Roboto'
+from pathlib import Path
 
 natoms_to_color = {
         'diatomics': '#F4B400', # Yellow
@@ -16,28 +11,37 @@ natoms_to_color = {
         '>3 atoms': '#4285F4', # Blue
 }
 
-@dataclass
-class Molecule:
-    """ Name and year of first laser cooling of a molecule. """
-    name: str
-    date: date
-    natoms: int
-
-molecules = [
-        Molecule(name='SrF', date=date(2010, 9, 19), natoms=2),
-        Molecule(name='YO',  date=date(2013, 4,  1), natoms=2),
-        Molecule(name='CaF', date=date(2014, 5, 16), natoms=2),
-		Molecule(name='YbF', date=date(2018, 3, 22), natoms=2),
-		Molecule(name='BaH', date=date(2020, 8, 18), natoms=2),
-		Molecule(name='CaH', date=date(2022, 8, 9), natoms=2),
-		Molecule(name='BaF', date=date(2022, 3, 14), natoms=2),
-		Molecule(name='CaD', date=date(2024, 8, 5), natoms=2),
-        Molecule(name='SrOH', date=date(2017, 4, 24), natoms=3),
-        Molecule(name='YbOH', date=date(2020, 2, 19), natoms=3),
-        Molecule(name='CaOH', date=date(2020, 3, 31), natoms=3),
-        Molecule(name='CaOCH$_3$', date=date(2020, 9, 11), natoms=6),
+# Name, date of first laser cooling, and number of atoms of each molecule.
+first_cooled = [
+        ('SrF', date(2010, 9, 19), 2),
+        ('YO',  date(2013, 4,  1), 2),
+        ('CaF', date(2014, 5, 16), 2),
+        ('YbF', date(2018, 3, 22), 2),
+        ('BaH', date(2020, 8, 18), 2),
+        ('CaH', date(2022, 8,  9), 2),
+        ('BaF', date(2022, 3, 14), 2),
+        ('CaD', date(2024, 8,  5), 2),
+        ('SrOH', date(2017, 4, 24), 3),
+        ('YbOH', date(2020, 2, 19), 3),
+        ('CaOH', date(2020, 3, 31), 3),
+        ('CaOCH$_3$', date(2020, 9, 11), 6),
 ]
-molecules.sort(key=lambda molecule: molecule.date)
+
+# Structure of arrays: one field per property, one row per molecule.
+# The name field is sized from the data so that no name gets truncated.
+molecules = np.array(
+    [
+        (name, cooled.year, natoms, cooled.toordinal())
+        for name, cooled, natoms in first_cooled
+    ],
+    dtype=[
+        ('name', f'U{max(len(name) for name, _, _ in first_cooled)}'),
+        ('year', 'i2'),
+        ('natoms', 'i1'),
+        ('ordinal', 'i4'),
+    ],
+)
+molecules.sort(order='ordinal')
 
 def get_args():
     parser = argparse.ArgumentParser(
@@ -52,41 +56,79 @@ def get_args():
     return args
 
 
-def accumulate_by_year(
-    yit: Iterator[int],
-    mit: Iterator[Molecule],
-) -> list[int]:
-    mol_cnt_accumulated = [] 
-    out_year = next(yit)
-    molecule = next(mit)
-    counter = 0
-    while True:
-        if out_year < molecule.date.year:
-            mol_cnt_accumulated += [counter]
-            try:
-                out_year = next(yit)
-            except StopIteration:
-                raise RuntimeError("End of years before end of molecules.")
-            continue
-
-        counter += 1
-        try:
-            molecule = next(mit)
-        except StopIteration:
-            mol_cnt_accumulated += [counter]
-            for out_year in yit:
-                mol_cnt_accumulated += [counter]
-            break
-    return mol_cnt_accumulated
+def figure_key(rc_params: dict) -> str:
+    """ Hash of everything the saved figure depends on.
+
+    Covers the Matplotlib and NumPy versions, the resolved rcParams
+    (including the font choice), and the source of this script, which holds
+    both the molecule data and the plotting code.
+    """
+    blake = hashlib.blake2b()
+    blake.update(importlib.metadata.version('matplotlib').encode())
+    blake.update(importlib.metadata.version('numpy').encode())
+    blake.update(repr(sorted(rc_params.items())).encode())
+    blake.update(Path(__file__).read_bytes())
+    return blake.hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.blake2b(path.read_bytes()).hexdigest()
+
+
+def figure_is_current(figure_path: Path, key_path: Path, key: str) -> bool:
+    """ The sidecar at `key_path` holds the figure key and the digest of the
+    PDF written with it. Both must match for the saved figure to be reused.
+    """
+    if not figure_path.exists() or not key_path.exists():
+        return False
+    stored = key_path.read_text(errors='ignore').split()
+    return stored == [key, file_digest(figure_path)]
 
 
 def main():
     args = get_args()
-    timeline = [molecule.date.year for molecule in molecules]
+
+    # Matplotlib is imported only once the arguments are parsed, so that
+    # `--help` and argument errors do not pay for it.
+    import matplotlib
+    if args.save is True:
+        # No window is opened; skip loading a GUI toolkit.
+        matplotlib.use('Agg')
+    import matplotlib.font_manager as mfont
+
+    installed_fonts = {font.name for font in mfont.fontManager.ttflist}
+    if 'Roboto' in installed_fonts:
+        matplotlib.rcParams['font.family'] = 'Roboto'
+
+    figure_path = Path('laser_cooled_molecules.pdf')
+    key_path = Path('laser_cooled_molecules.pdf.blake2b')
+    key = None
+    if args.save is True:
+        key = figure_key(matplotlib.rcParams)
+        if figure_is_current(figure_path, key_path, key):
+            print(f'{figure_path} is up to date, not re-rendered.')
+            return
+
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatch
+    import matplotlib.collections as mcollections
+    import matplotlib.ticker as mticker
+
+    timeline = molecules['year']
+    natoms = molecules['natoms']
+    colors = np.where(
+        natoms == 2,
+        natoms_to_color['diatomics'],
+        np.where(
+            natoms == 3,
+            natoms_to_color['triatomics'],
+            natoms_to_color['>3 atoms'],
+        ),
+    )
 
     years = np.arange(
-        start=min(timeline)-1,
-        stop=max(timeline)+2,
+        start=timeline.min()-1,
+        stop=timeline.max()+2,
         step=1,
         dtype=int,
     )
@@ -98,9 +140,11 @@ def main():
     )
     ax = fig.subplots()
 
-    total_by_year = accumulate_by_year(
-        yit=iter(years),
-        mit=iter(molecules),
+    # Molecules cooled up to and including each year.
+    total_by_year = np.searchsorted(
+        timeline,
+        years,
+        side='right',
     )
     
     ax.step(
@@ -112,26 +156,36 @@ def main():
         lw=2,
     )
 
-    for pos, molecule in enumerate(molecules):
+    # One rectangle per molecule, from its first cooling to the last year.
+    bottom = np.arange(len(molecules))
+    top = bottom + 1
+    left = timeline
+    right = np.full_like(left, years[-1])
+    bands = np.stack(
+        [
+            np.column_stack([left, bottom]),
+            np.column_stack([left, top]),
+            np.column_stack([right, top]),
+            np.column_stack([right, bottom]),
+        ],
+        axis=1,
+    )
+    ax.add_collection(
+        mcollections.PolyCollection(
+            bands,
+            facecolors=colors,
+            edgecolors=colors,
+        )
+    )
+
+    for y, name in zip(bottom + 0.5, molecules['name']):
         ax.text(
             x=2025.1,
-            y=pos + 0.5,
-            s=molecule.name,
+            y=y,
+            s=name,
             ha='left',
             va='center',
         )
-        if molecule.natoms == 2:
-            category = "diatomics"
-        elif molecule.natoms == 3:
-            category = "triatomics"
-        else:
-            category = ">3 atoms"
-        ax.fill_between(
-            x=[molecule.date.year, years[-1]],
-            y1=[pos]*2,
-            y2=[pos + 1]*2,
-            color=natoms_to_color[category],
-        )
 
 
     ax.xaxis.set_label_text('Year')
@@ -177,7 +231,8 @@ def main():
     ax.legend(handles=handles)
 
     if args.save is True:
-        fig.savefig('laser_cooled_molecules.pdf')
+        fig.savefig(figure_path)
+        key_path.write_text(f'{key}\n{file_digest(figure_path)}\n')
     else:
         plt.show()
 